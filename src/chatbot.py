@@ -4,9 +4,12 @@ Restaurant ordering chatbot with guardrails for visually impaired users.
 This chatbot demonstrates the integration of guardrails into a local LLM via Ollama.
 """
 
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator, Tuple
+from collections import Counter, deque
 import json
+import re
 import uuid
+import httpx
 import ollama
 
 from src.guardrails.manager import GuardrailManager
@@ -23,24 +26,34 @@ class RestaurantChatbot:
         self,
         menu: Optional[Dict] = None,
         model: str = "llama3.2",
-        ollama_host: Optional[str] = None
+        ollama_host: Optional[str] = None,
+        max_history: int = 20
     ):
         """
         Initialize the chatbot with GuardrailManager.
+        max_history bounds how many recent turns are kept and re-sent to the LLM.
         """
 
         self.menu = menu or SAMPLE_MENU
         self.model = model
+        self.max_history = max_history
         self.guardrails = GuardrailManager(self.menu)
         self.current_session_id = str(uuid.uuid4()) # Session management for stateful guardrails
-        self.conversation_history = []
-        self.llm_messages = []
+        self.conversation_history = deque(maxlen=max_history)
+        self._status_counts = Counter() # guardrail status -> count, covers the whole conversation
         self.system_prompt = self._create_system_prompt()
-
-        if ollama_host:
-            self.client = ollama.Client(host=ollama_host)
-        else:
-            self.client = ollama
+        # The system message is kept outside the bounded history and always sent
+        # first, unchanged, so Ollama can reuse its cached prefix
+        self.system_message = {"role": "system", "content": self.system_prompt}
+        self.llm_messages = deque(maxlen=2 * max_history) # user + assistant per turn
+
+        # One persistent client (connection pool) reused for every turn.
+        # host=None falls back to $OLLAMA_HOST, then http://localhost:11434.
+        self.client = ollama.Client(
+            host=ollama_host,
+            timeout=httpx.Timeout(60.0, connect=2.0),
+            limits=httpx.Limits(max_keepalive_connections=4)
+        )
 
     def _create_system_prompt(self) -> str:
         """
@@ -73,38 +86,11 @@ class RestaurantChatbot:
         """
         Process query using GuardrailManager.
         """
-        result = {
-            "response": "",
-            "guardrail_result": None,
-            "similarity_score": 0.0,
-            "blocked": False,
-            "llm_used": False,
-            "validation_result": None,
-            "validation_errors": []
-        }
+        result = self._new_result()
 
         # --- 1. Input Guardrails ---
-        if not skip_guardrails:
-            input_result = self.guardrails.check_input(user_input, self.current_session_id)
-            
-            # Map new result format to old keys for compatibility with your demo loop
-            result["guardrail_result"] = input_result.topic_status
-            result["similarity_score"] = input_result.similarity_score
-            
-            if input_result.is_blocked:
-                result["blocked"] = True
-                if input_result.topic_status == "off_topic":
-                    result["response"] = self._handle_offtopic()
-                else:
-                    result["response"] = f"I cannot process that request: {input_result.block_reason}"
-                
-                self._log_history(user_input, input_result.topic_status)
-                return result
-                
-            elif input_result.topic_status == "clarify":
-                result["response"] = self._handle_clarification()
-                self._log_history(user_input, "clarify")
-                return result
+        if not skip_guardrails and self._apply_input_guardrails(user_input, result):
+            return result
 
         # --- 2. LLM Generation ---
         try:
@@ -112,31 +98,7 @@ class RestaurantChatbot:
             result["llm_used"] = True
 
             # --- 3. Output Guardrails (Managed by GuardrailManager) ---
-            if not skip_guardrails:
-                # This now includes Allergen checks using session state!
-                validation = self.guardrails.check_output(llm_response, self.current_session_id)
-                
-                result["validation_result"] = validation
-                result["validation_errors"] = validation.errors
-
-                if validation.critical_errors:
-                    # CRITICAL: Block immediately (e.g., unsafe allergen recommendation)
-                    result["response"] = self._handle_critical_validation_error(validation, llm_response)
-                    result["blocked"] = True
-                elif not validation.is_valid:
-                    # HIGH/MEDIUM: Try to auto-correct (e.g., wrong prices)
-                    corrected_response = self._try_correct_response(llm_response, validation)
-                    if corrected_response:
-                         result["response"] = corrected_response
-                         # Optionally mark that it was auto-corrected
-                    else:
-                         # Could not auto-correct a high severity error -> block
-                         result["response"] = self._handle_validation_error(validation)
-                         result["blocked"] = True
-                else:
-                    result["response"] = llm_response
-            else:
-                result["response"] = llm_response
+            self._apply_output_guardrails(llm_response, result, skip_guardrails)
 
         except Exception as e:
             result["response"] = f"Error processing request: {str(e)}. Please try again."
@@ -147,22 +109,146 @@ class RestaurantChatbot:
 
         return result
 
+    def process_query_stream(
+        self, user_input: str, skip_guardrails: bool = False
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Streaming variant of process_query, e.g. for text-to-speech.
+
+        Yields ("partial", text) for each LLM chunk as it arrives, then exactly one
+        ("final", result) once the full response went through the output guardrails.
+        result["response"] is the validated text; if result["blocked"] or
+        result["corrected"] is set it differs from the streamed text and must
+        replace it.
+        """
+        result = self._new_result()
+
+        # --- 1. Input Guardrails (blocked queries never reach the LLM) ---
+        if not skip_guardrails and self._apply_input_guardrails(user_input, result):
+            yield "final", result
+            return
+
+        # --- 2. LLM Generation (streamed) ---
+        try:
+            chunks = []
+            for chunk in self._stream_llm_response(user_input):
+                chunks.append(chunk)
+                yield "partial", chunk
+            result["llm_used"] = True
+
+            # --- 3. Output Guardrails on the complete response ---
+            self._apply_output_guardrails("".join(chunks), result, skip_guardrails)
+
+        except Exception as e:
+            result["response"] = f"Error processing request: {str(e)}. Please try again."
+            result["llm_used"] = False
+
+        if not result["blocked"]:
+             self._log_history(user_input, "on_topic" if not skip_guardrails else "skipped")
+
+        yield "final", result
+
+    def _new_result(self) -> Dict[str, Any]:
+        return {
+            "response": "",
+            "guardrail_result": None,
+            "similarity_score": 0.0,
+            "blocked": False,
+            "corrected": False,
+            "llm_used": False,
+            "validation_result": None,
+            "validation_errors": []
+        }
+
+    def _apply_input_guardrails(self, user_input: str, result: Dict[str, Any]) -> bool:
+        """
+        Run input guardrails and fill in result.
+        Returns True if the query was answered here (blocked or needs clarification).
+        """
+        input_result = self.guardrails.check_input(user_input, self.current_session_id)
+
+        # Map new result format to old keys for compatibility with your demo loop
+        result["guardrail_result"] = input_result.topic_status
+        result["similarity_score"] = input_result.similarity_score
+
+        if input_result.is_blocked:
+            result["blocked"] = True
+            if input_result.topic_status == "off_topic":
+                result["response"] = self._handle_offtopic()
+            else:
+                result["response"] = f"I cannot process that request: {input_result.block_reason}"
+
+            self._log_history(user_input, input_result.topic_status)
+            return True
+
+        elif input_result.topic_status == "clarify":
+            result["response"] = self._handle_clarification()
+            self._log_history(user_input, "clarify")
+            return True
+
+        return False
+
+    def _apply_output_guardrails(self, llm_response: str, result: Dict[str, Any], skip_guardrails: bool):
+        """Validate a complete LLM response and fill in the final response text."""
+        if skip_guardrails:
+            result["response"] = llm_response
+            return
+
+        # This now includes Allergen checks using session state!
+        validation = self.guardrails.check_output(llm_response, self.current_session_id)
+
+        result["validation_result"] = validation
+        result["validation_errors"] = validation.errors
+
+        if validation.critical_errors:
+            # CRITICAL: Block immediately (e.g., unsafe allergen recommendation)
+            result["response"] = self._handle_critical_validation_error(validation, llm_response)
+            result["blocked"] = True
+        elif not validation.is_valid:
+            # HIGH/MEDIUM: Try to auto-correct (e.g., wrong prices)
+            corrected_response = self._try_correct_response(llm_response, validation)
+            if corrected_response:
+                 result["response"] = corrected_response
+                 result["corrected"] = True
+            else:
+                 # Could not auto-correct a high severity error -> block
+                 result["response"] = self._handle_validation_error(validation)
+                 result["blocked"] = True
+        else:
+            result["response"] = llm_response
+
     def _log_history(self, user_input, status):
         """Helper to log history for stats."""
         self.conversation_history.append({
             "user": user_input,
             "guardrail": status
         })
+        self._status_counts[status] += 1
 
     def _get_llm_response(self, user_input: str) -> str:
-        self.llm_messages.append({"role": "user", "content": user_input})
-        response = self.client.chat(
+        """Non-streaming wrapper: collect the whole streamed response."""
+        return "".join(self._stream_llm_response(user_input))
+
+    def _stream_llm_response(self, user_input: str) -> Iterator[str]:
+        """
+        Stream the LLM response chunk by chunk. The turn is added to the history
+        only once the stream completes, so a failed or abandoned request leaves
+        user/assistant messages alternating.
+        """
+        user_message = {"role": "user", "content": user_input}
+        stream = self.client.chat(
             model=self.model,
-            messages=[{"role": "system", "content": self.system_prompt}, *self.llm_messages]
+            messages=[self.system_message, *self.llm_messages, user_message],
+            stream=True,
+            options={"num_ctx": 8192},
+            keep_alive=-1 # keep the model (and its prompt cache) loaded between turns
         )
-        assistant_message = response['message']['content']
-        self.llm_messages.append({"role": "assistant", "content": assistant_message})
-        return assistant_message
+        chunks = []
+        for chunk in stream:
+            content = chunk['message']['content']
+            chunks.append(content)
+            yield content
+        self.llm_messages.extend((user_message, {"role": "assistant", "content": "".join(chunks)}))
 
     def _handle_offtopic(self) -> str:
         return ("I'm sorry, but I can only help you with menu ordering and food-related questions. "
@@ -185,33 +271,40 @@ class RestaurantChatbot:
     def _try_correct_response(self, llm_response: str, validation) -> Optional[str]:
         """
         Updated auto-correction using the new '.corrected_text' field.
+        All fixes are applied in a single pass over the response.
         """
-        corrected = llm_response
-        fixed_something = False
-        
-        for error in validation.errors:
-            # Only apply fixes if explicitly provided by the validator
-            if error.original_text and error.corrected_text:
-                corrected = corrected.replace(error.original_text, error.corrected_text)
-                fixed_something = True
-        
-        return corrected if fixed_something else None
+        # Only apply fixes if explicitly provided by the validator
+        replacements = {
+            error.original_text: error.corrected_text
+            for error in validation.errors
+            if error.original_text and error.corrected_text
+        }
+        if not replacements:
+            return None
+
+        # Longest segments first, so an overlapping shorter segment never wins
+        pattern = re.compile("|".join(
+            map(re.escape, sorted(replacements, key=len, reverse=True))
+        ))
+        return pattern.sub(lambda m: replacements[m.group(0)], llm_response)
 
     def get_conversation_summary(self) -> Dict[str, Any]:
-        # (Kept exactly as before)
-        total = len(self.conversation_history)
+        # Constant time: read the counters maintained by _log_history
+        total = sum(self._status_counts.values())
         if total == 0: return {"total_queries": 0}
-        on_topic = sum(1 for msg in self.conversation_history if msg["guardrail"] == "on_topic")
-        off_topic = sum(1 for msg in self.conversation_history if msg["guardrail"] == "off_topic")
-        clarify = sum(1 for msg in self.conversation_history if msg["guardrail"] == "clarify")
+        on_topic = self._status_counts["on_topic"]
+        off_topic = self._status_counts["off_topic"]
+        clarify = self._status_counts["clarify"]
         return {
             "total_queries": total, "on_topic": on_topic, "off_topic": off_topic, "clarify": clarify,
-            "on_topic_rate": on_topic/total, "off_topic_rate": off_topic/total
+            "on_topic_rate": on_topic/total, "off_topic_rate": off_topic/total,
+            "clarify_rate": clarify/total
         }
 
     def reset_conversation(self):
-        self.conversation_history = []
-        self.llm_messages = []
+        self.conversation_history.clear()
+        self._status_counts = Counter()
+        self.llm_messages.clear()
         # Also reset session state in guardrails!
         self.guardrails.reset_session(self.current_session_id)
         self.current_session_id = str(uuid.uuid4())
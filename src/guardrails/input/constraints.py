@@ -1,4 +1,4 @@
-from typing import Set
+from typing import Optional, Set
 import re
 
 class ConstraintExtractor:
@@ -19,27 +19,33 @@ class ConstraintExtractor:
             'nut': 'nuts',
             'egg': 'eggs'
         }
+        # Single lookup (keyword -> standard key) and one compiled alternation,
+        # so extraction is one regex pass instead of a Python loop per word.
+        # Longest keywords first, so "peanuts" is tried before "peanut" and
+        # the engine never has to backtrack out of a shorter prefix.
+        self._lookup = {**{a: a for a in self.supported_allergens}, **self.synonyms}
+        keywords = sorted(self._lookup, key=len, reverse=True)
+        # Matched against lowercased text, so no IGNORECASE needed
+        self._pattern = re.compile(r"\b(" + "|".join(map(re.escape, keywords)) + r")\b")
 
-    def extract(self, text: str, current_constraints: Set[str]) -> Set[str]:
+    def extract(self, text: str, current_constraints: Set[str], text_lower: Optional[str] = None) -> Set[str]:
         """
         Update constraints based on user input.
-        Returns a set of constraints.
+        text_lower can pass an already lowercased copy of text to avoid redoing it.
+        Returns a set of constraints (the given set itself if nothing new was found).
         """
-        text_lower = text.lower()
-        new_constraints = current_constraints.copy()
+        if text_lower is None:
+            text_lower = text.lower()
 
         # Very simple keyword matching for MVP
         # Matches: "allergic to X", "allergy X", "no X" (simplified)
-        for word in text_lower.replace('.', ' ').replace(',', ' ').split():
-            # Check standard allergens
-            if word in self.supported_allergens:
-                new_constraints.add(word)
-            # Check synonyms
-            elif word in self.synonyms:
-                new_constraints.add(self.synonyms[word])
-        
+        found = {self._lookup[m] for m in self._pattern.findall(text_lower)}
+
         # A slightly better regex approach if you want to be a bit more precise:
         # re.search(r'(allergic|allergy|no)\s+(to\s+)?(peanuts|gluten|dairy...)', text_lower)
         # But simple keyword might be enough for MVP if you document limitations.
-        
-        return new_constraints
+
+        # Only copy the constraints when something new was found
+        if found <= current_constraints:
+            return current_constraints
+        return current_constraints | found
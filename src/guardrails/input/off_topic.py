@@ -1,11 +1,20 @@
-from typing import List, Literal, Union, Tuple, Optional
+from typing import Dict, List, Literal, Union, Tuple, Optional
+from collections import OrderedDict
+from pathlib import Path
+import hashlib
+import json
+import os
+import platform
 import numpy as np
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import SentenceTransformer
 import time
 
 THRESHOLD_CLARIFY=0.48
 THRESHOLD_OFFTOPIC=0.4
 
+# Detection cache: repeated queries skip encoding and the prototype comparison
+CACHE_SIZE=512
+
 # Prototype queries that represent on-topic interactions
 ON_TOPIC_PROTOTYPES = [
     # Menu inquiry
@@ -51,6 +60,50 @@ ON_TOPIC_PROTOTYPES = [
     "Can I get the burger?",
 ]
 
+# On-disk cache of prototype embeddings, so startup does not re-encode them.
+# GUARDRAILS_CACHE_DIR moves it, e.g. to a persisted CI cache directory.
+PROTOTYPE_CACHE_DIR = Path(
+    os.environ.get("GUARDRAILS_CACHE_DIR", Path.home() / ".cache" / "guardrails")
+) / "protos"
+
+# Loaded encoders shared by all detectors, keyed by (model_name, backend, file_name)
+_MODEL_CACHE: Dict[Tuple[str, str, Optional[str]], SentenceTransformer] = {}
+
+
+def _load_model(model_name: str, backend: str, file_name: Optional[str] = None) -> SentenceTransformer:
+    """Load an encoder once per process and reuse it across detectors."""
+    key = (model_name, backend, file_name)
+    model = _MODEL_CACHE.get(key)
+    if model is None:
+        print(f"Loading off-topic detection model: {model_name} ({backend})...")
+        model_kwargs = {"file_name": file_name} if file_name else None
+        model = SentenceTransformer(model_name, backend=backend, model_kwargs=model_kwargs)
+        _MODEL_CACHE[key] = model
+    return model
+
+
+def _quantized_onnx_file() -> Optional[str]:
+    """
+    Pick the int8 (dynamically quantized) ONNX export matching this CPU.
+    Returns None when the CPU has no fast int8 dot-product instructions,
+    in which case the fp32 model is used.
+    """
+    machine = platform.machine().lower()
+    if machine in ("arm64", "aarch64"):
+        return "onnx/model_qint8_arm64.onnx"
+
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return None
+
+    # VNNI (vpdpbusd) is what makes int8 MatMul/Gemm faster than fp32
+    if "avx512_vnni" in flags:
+        return "onnx/model_qint8_avx512_vnni.onnx"
+    return None
+
+
 class OffTopicDetector:
     """
     Off-topic detection using embedding similarity.
@@ -62,46 +115,120 @@ class OffTopicDetector:
         model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
         threshold_offtopic: float=THRESHOLD_OFFTOPIC,
         threshold_clarify: float=THRESHOLD_CLARIFY,
-        prototypes: Optional[List[str]]=None
+        prototypes: Optional[List[str]]=None,
+        cache_size: int=CACHE_SIZE,
+        backend: Literal["torch", "onnx"]="torch",
+        quantized: bool=False
     ):
 
-        print(f"Loading off-topic detection model: {model_name}...")
-        self.model = SentenceTransformer(model_name)
+        # backend="onnx" runs the encoder through ONNX Runtime (fused CPU kernels)
+        # instead of eager PyTorch; needs `pip install sentence-transformers[onnx]`.
+        # quantized=True loads the int8 export on CPUs with VNNI (or ARM64),
+        # and falls back to the fp32 model elsewhere.
+        file_name = None
+        if quantized:
+            backend = "onnx"
+            file_name = _quantized_onnx_file()
+            if not file_name:
+                print("No int8 dot-product support detected, using fp32 ONNX model.")
+
+        self.model = _load_model(model_name, backend, file_name)
+        self.model_id = "|".join([model_name, backend, file_name or ""])
         self.threshold_offtopic = threshold_offtopic
         self.threshold_clarify = threshold_clarify
 
         # Use provided prototypes or defaults
         self.prototypes = prototypes or ON_TOPIC_PROTOTYPES
 
-        # Precompute prototype embeddings for efficiency
-        self.prototype_embeddings = self.model.encode(
+        # Precompute prototype embeddings for efficiency (or load them from disk).
+        # Kept as a float32 (num_prototypes, dim) NumPy matrix of unit vectors, so
+        # cosine similarity against a query is a single BLAS GEMV.
+        self.prototype_embeddings = self._load_prototype_embeddings().astype(np.float32, copy=False)
+
+        # LRU cache of previous detections: text -> (status, score),
+        # so a repeated query skips encoding entirely.
+        self.cache_size = max(cache_size, 0)
+        self._exact_cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        print("Off-topic detector ready.")
+
+    def _load_prototype_embeddings(self) -> np.ndarray:
+        """
+        Memory-map cached prototype embeddings keyed by model and prototype list,
+        encoding (and caching) them only on a miss.
+        """
+        key = hashlib.sha256(
+            (self.model_id + "|" + json.dumps(self.prototypes)).encode()
+        ).hexdigest()
+        path = PROTOTYPE_CACHE_DIR / f"{key}.npy"
+
+        if path.exists():
+            try:
+                return np.load(path, mmap_mode="r")
+            except (OSError, ValueError) as e:
+                print(f"Warning: Ignoring unreadable prototype cache {path}: {e}")
+
+        embeddings = self.model.encode(
             self.prototypes,
-            convert_to_tensor=True,
+            convert_to_numpy=True,
             normalize_embeddings=True
         )
-        print("Off-topic detector ready.")
+
+        try:
+            PROTOTYPE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            # Write to a temp file first so concurrent readers never see a partial file
+            tmp_path = path.with_name(f"{key}.{os.getpid()}.tmp.npy")
+            np.save(tmp_path, embeddings)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # Don't crash the application if caching fails
+            print(f"Warning: Failed to cache prototype embeddings: {e}")
+
+        return embeddings
 
     def detect(self, text: str) -> Literal["off_topic", "clarify", "on_topic"]:
         """
         Detect if the input text is off-topic based on similarity thresholds.
         Returns just the status string for simpler integration.
         """
+        # 0. Exact cache lookup. Keyed on the text exactly as it is encoded:
+        # the tokenizer is case-sensitive, so "Pizza?" and " pizza? " can score differently.
+        key = text
+        cached = self._exact_cache.get(key)
+        if cached is not None:
+            self._exact_cache.move_to_end(key)
+            return cached
+
         # 1. Encode user input
-        embedding = self.model.encode(text, convert_to_tensor=True, normalize_embeddings=True)
+        query = self.model.encode(
+            text, convert_to_numpy=True, normalize_embeddings=True
+        ).astype(np.float32, copy=False)
 
-        # 2. Calculate cosine similarities with all prototypes
-        cosine_scores = util.cos_sim(embedding, self.prototype_embeddings)[0]
+        # 2. Calculate cosine similarities with all prototypes (unit vectors)
+        cosine_scores = self.prototype_embeddings @ query
 
         # 3. Find the maximum similarity score (best match)
-        max_score = float(np.max(cosine_scores.cpu().numpy()))
+        max_score = float(cosine_scores.max())
 
         # 4. Compare against thresholds
         if max_score < self.threshold_offtopic:
-            return "off_topic", max_score
+            result = "off_topic", max_score
         elif max_score < self.threshold_clarify:
-            return "clarify", max_score
+            result = "clarify", max_score
         else:
-            return "on_topic", max_score
+            result = "on_topic", max_score
+
+        self._remember(key, result)
+        return result
+
+    def _remember(self, key: str, result: Tuple[str, float]):
+        """Insert a detection into the cache, evicting the oldest entry once full."""
+        if self.cache_size == 0:
+            return
+
+        self._exact_cache[key] = result
+        self._exact_cache.move_to_end(key)
+        if len(self._exact_cache) > self.cache_size:
+            self._exact_cache.popitem(last=False)
 
 
 # Convenience function for one-off detections
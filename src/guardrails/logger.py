@@ -1,14 +1,21 @@
 """
 Simple JSON logger for guardrail events.
 Logs all validation errors and blocks to logs/guardrails.log
+
+Events are queued and written by a background thread, so logging never
+blocks the guardrail checks on file I/O.
 """
 
-import json
+import atexit
 import os
+import queue
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+import orjson
+
 
 class GuardrailLogger:
     """Simple JSON logger for tracking guardrail events."""
@@ -17,21 +24,63 @@ class GuardrailLogger:
         self.log_file = log_file
         self._ensure_log_directory()
 
+        # Writer thread: keeps the file open and writes queued events in batches
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._file = None
+        self._worker = threading.Thread(target=self._run, name="guardrail-logger", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
     def _ensure_log_directory(self):
         """Create logs directory if it doesn't exist."""
         log_dir = Path(self.log_file).parent
         log_dir.mkdir(exist_ok=True)
 
     def _write_log(self, event: Dict[str, Any]):
-        """Write a JSON event to the log file."""
+        """Queue a JSON event for the writer thread."""
         event["timestamp"] = datetime.now().isoformat()
+        self._queue.put_nowait(event)
+
+    def _run(self):
+        """Writer loop: block for one event, then drain whatever else is queued."""
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Serialize each event on its own, so one bad event doesn't drop the batch
+            lines = []
+            for event in batch:
+                try:
+                    lines.append(orjson.dumps(event, option=orjson.OPT_APPEND_NEWLINE))
+                except orjson.JSONEncodeError as e:
+                    print(f"Warning: Skipping log event that cannot be serialized: {e}")
+
+            try:
+                if self._file is None:
+                    self._file = open(self.log_file, "ab")
+                self._file.write(b"".join(lines))
+                self._file.flush()
+            except Exception as e:
+                # Don't crash the application if logging fails
+                print(f"Warning: Failed to write to log: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Block until every queued event has been written."""
+        self._queue.join()
 
-        try:
-            with open(self.log_file, "a") as f:
-                f.write(json.dumps(event) + "\n")
-        except Exception as e:
-            # Don't crash the application if logging fails
-            print(f"Warning: Failed to write to log: {e}")
+    def close(self):
+        """Write pending events and close the log file (called at exit)."""
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
 
     def log_input_block(
         self,
@@ -1,17 +1,20 @@
 from typing import Dict, Optional, Set
 from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
 
 # Input Guardrails
 from .input.off_topic import OffTopicDetector
 from .input.constraints import ConstraintExtractor
 
 # Output Guardrails
-from .output.base import ValidationResult, ErrorSeverity
+from .output.base import ValidationResult, ErrorSeverity, get_menu_layout
 from .output.price import PriceValidator
 from .output.allergen import AllergenValidator
+from .output.pipeline import OutputValidationPipeline
 
 # Logging
 from .logger import get_logger
+from ..menu_data import SAMPLE_MENU, MENU_INDEX, build_menu_index
 
 @dataclass
 class GuardrailInputResult:
@@ -27,18 +30,30 @@ class GuardrailManager:
     Orchestrates Off-Topic, Constraints, Price, and Allergen checks.
     """
 
-    def __init__(self, menu: Dict):
+    def __init__(self, menu: Dict, parallel_validation: bool = False):
+        """
+        parallel_validation runs the output validators concurrently on a thread pool.
+        Only worth enabling for validators that release the GIL (e.g. model-based
+        ones); the regex-based price/allergen checks are faster run sequentially.
+        """
         print("Initializing Guardrail Manager...")
         # 1. Input Guardrails
-        self.off_topic_detector = OffTopicDetector()
+        # The off-topic detector loads an embedding model, so it is created
+        # on first use (see the off_topic_detector property).
+        self._off_topic_detector: Optional[OffTopicDetector] = None
         self.constraint_extractor = ConstraintExtractor()
 
-        # 2. Output Guardrails (Directly managing them now)
-        self.price_validator = PriceValidator()
-        self.allergen_validator = AllergenValidator()
+        # 2. Build fast menu index (and its array layout) once for all validators
+        # The sample menu's index is prebuilt, so every manager shares it (and its layout)
+        self.menu_index = MENU_INDEX if menu is SAMPLE_MENU else build_menu_index(menu)
+        self.menu_layout = get_menu_layout(self.menu_index)
 
-        # 3. Build fast menu index once for all validators
-        self.menu_index = self._build_menu_index(menu)
+        # 3. Output Guardrails (Directly managing them now)
+        self.price_validator = PriceValidator(self.menu_layout)
+        self.allergen_validator = AllergenValidator(self.menu_layout)
+        self.output_pipeline = OutputValidationPipeline(self.price_validator, self.allergen_validator)
+
+        self._executor = ThreadPoolExecutor(max_workers=2) if parallel_validation else None
 
         # 4. Session State
         self._sessions: Dict[str, Dict] = {}
@@ -47,13 +62,12 @@ class GuardrailManager:
         self.logger = get_logger()
         print("Guardrails ready.")
 
-    def _build_menu_index(self, menu: Dict) -> Dict[str, Dict]:
-        """Helper to flatten menu for O(1) lookups by validators."""
-        index = {}
-        for category, items in menu.items():
-            for item in items:
-                index[item['name'].lower()] = item
-        return index
+    @property
+    def off_topic_detector(self) -> OffTopicDetector:
+        """Off-topic detector, loaded lazily on the first input check."""
+        if self._off_topic_detector is None:
+            self._off_topic_detector = OffTopicDetector()
+        return self._off_topic_detector
 
     def _get_session_constraints(self, session_id: str) -> Set[str]:
         if session_id not in self._sessions:
@@ -83,22 +97,30 @@ class GuardrailManager:
 
     def check_output(self, llm_response: str, session_id: str = "default") -> ValidationResult:
         """
-        Run all output validators sequentially and aggregate errors.
+        Run all output validators (sequentially, or concurrently when
+        parallel_validation is enabled) and aggregate errors.
         """
         user_constraints = self._get_session_constraints(session_id)
         all_errors = []
 
-        # Run Price Validator
-        all_errors.extend(
-            self.price_validator.validate(llm_response, self.menu_index)
-        )
-
-        # Run Allergen Validator (needs constraints)
-        all_errors.extend(
-            self.allergen_validator.validate(llm_response, self.menu_index, user_constraints)
-        )
-
-        # Log errors
+        if self._executor is not None:
+            # Price Validator ignores constraints, Allergen Validator needs them
+            checks = [
+                (self.price_validator, None),
+                (self.allergen_validator, user_constraints),
+            ]
+            futures = [
+                self._executor.submit(validator.validate, llm_response, self.menu_index, constraints)
+                for validator, constraints in checks
+            ]
+            # Collect in submission order so errors (and log lines) stay deterministic
+            for future in futures:
+                all_errors.extend(future.result())
+        else:
+            # Both validators share one scan of the response
+            all_errors.extend(self.output_pipeline.validate(llm_response, self.menu_index, user_constraints))
+
+        # Log errors (serially, after all validators finished)
         for error in all_errors:
             if error.severity == ErrorSeverity.CRITICAL:
                 self.logger.log_critical_block(
@@ -1,14 +1,15 @@
 # src/guardrails/output/allergen.py
 
 import re
-from typing import List, Dict, Set
-from src.guardrails.output.base import BaseValidator, ValidationError, ErrorSeverity
+from typing import List, Dict, Set, Optional, Pattern
+from src.guardrails.output.base import BaseValidator, ValidationError, ErrorSeverity, MenuLayout, NormalizedText
 
 class AllergenValidator(BaseValidator):
     """
     Ensures LLM does not recommend containing an allergen to the user.
     """
-    def __init__(self):
+    def __init__(self, layout: Optional[MenuLayout] = None):
+        super().__init__(layout)
         # Define regex patterns for common "safe" claims.
         # Key: standard allergen name (must match menu data)
         # Value: list of regex patterns indicating ABSENCE of that allergen
@@ -20,64 +21,105 @@ class AllergenValidator(BaseValidator):
             'eggs': [r'egg[\s-]*free', r'no\s+eggs?', r'without\s+eggs?'],
             'soy': [r'soy[\s-]*free', r'no\s+soy', r'without\s+soy'],
         }
+        # All claims in one compiled regex with a named group per allergen,
+        # so a single scan of the text finds every allergen claimed absent
+        self.safe_claim_regex = self._compile_claims(tuple(self.safe_claim_patterns))
+        # Tuple of allergens (in safe_claim_patterns order) -> regex for just their claims
+        self._claim_regexes: Dict[tuple, Pattern] = {tuple(self.safe_claim_patterns): self.safe_claim_regex}
 
-    def validate(self, text: str, menu_index: Dict[str, Dict], user_constraints: Set[str] = None) -> List[ValidationError]:
+    def _compile_claims(self, allergens: tuple) -> Pattern:
+        return re.compile(
+            "|".join(f"(?P<{allergen}>{'|'.join(self.safe_claim_patterns[allergen])})" for allergen in allergens),
+            re.IGNORECASE
+        )
+
+    def _claimed_free(self, text: str, allergens: List[str]) -> List[str]:
+        """Which of the given allergens the text claims are absent, in safe_claim_patterns order."""
+        key = tuple(allergen for allergen in self.safe_claim_patterns if allergen in allergens)
+        if not key:
+            return []
+        regex = self._claim_regexes.get(key)
+        if regex is None:
+            regex = self._claim_regexes[key] = self._compile_claims(key)
+        claimed = {m.lastgroup for m in regex.finditer(text)}
+        return [allergen for allergen in key if allergen in claimed]
+
+    def check(self, ctx: NormalizedText, user_constraints: Optional[Set[str]] = None) -> List[ValidationError]:
         """
-        Validate allergen safety.
+        Validate allergen safety of the dishes mentioned in ctx.
         Checks two things:
         1. False claims (e.g., saying Pad Thai is peanut-free).
         2. Unsafe recommendations (mentioning a dish that violates user_constraints).
         """
+        mentioned_rows = ctx.mentioned_rows
+        if not mentioned_rows:
+            return []
+
+        text = ctx.raw
+        layout = ctx.layout
         errors = []
         user_constraints = user_constraints or set()
-        text_lower = text.lower()
 
-        mentioned_dishes = []
-        for dish_name_lower, dish_info in menu_index.items():
-            if dish_name_lower in text_lower:
-                mentioned_dishes.append(dish_info)
+        # Allergen sets as integer bitmasks: each per-dish check is a single AND
+        user_mask = layout.mask_of(user_constraints)
 
-        if not mentioned_dishes:
-            return []
+        # Only claims about allergens of mentioned dishes that are not already
+        # blocked can produce an error, so only those claims are searched for
+        claim_mask = 0
+        for row in mentioned_rows:
+            if not layout.allergen_masks[row] & user_mask:
+                claim_mask |= layout.allergen_masks[row]
+        claimed_free = self._claimed_free(text, layout.allergens_of(claim_mask)) if claim_mask else []
+
+        claimed_mask = layout.mask_of(claimed_free)
+        relevant_mask = user_mask | claimed_mask
+        constraints_detail = None  # tuple(user_constraints), built on the first safety block
+        conflicting_segment = None  # text.strip(), built on the first false claim
+
+        for row in mentioned_rows:
+            dish_mask = layout.allergen_masks[row]
+            if not dish_mask & relevant_mask:
+                continue  # Dish has none of the user's allergens and none claimed absent
 
-        for dish in mentioned_dishes:
-            actual_allergens = set(a.lower() for a in dish.get('allergens', []))
+            dish_name = layout.names[row]
 
             # If user is allergic to X, and dish has X, do not mention it unless explicitly warning.
             # We just block any mention of unsafe dishes to be safe.
-            violating_allergens = user_constraints.intersection(actual_allergens)
-            if violating_allergens:
+            violating_mask = dish_mask & user_mask
+            if violating_mask:
+                violating_allergens = set(layout.allergens_of(violating_mask))
+                if constraints_detail is None:
+                    constraints_detail = tuple(user_constraints)
                 errors.append(ValidationError(
                     error_type="unsafe_recommendation",
                     severity=ErrorSeverity.CRITICAL,
-                    message=f"SAFETY BLOCK: User is allergic to {violating_allergens}, but response mentioned '{dish['name']}' which contains them.",
+                    message=f"SAFETY BLOCK: User is allergic to {violating_allergens}, but response mentioned '{dish_name}' which contains them.",
                     details={
-                        "dish": dish['name'],
-                        "violating_allergens": list(violating_allergens),
-                        "user_constraints": list(user_constraints)
+                        "dish": dish_name,
+                        "violating_allergens": tuple(violating_allergens),
+                        "user_constraints": constraints_detail
                     },
                     # TODO(later): Suggest a safer alternative
                 ))
                 continue # Skip to next dish if already blocked for this reason
 
-            for allergen, patterns in self.safe_claim_patterns.items():
+            for allergen in claimed_free:
                 # Only care if the dish actually ahas this allergen
-                if allergen in actual_allergens:
-                    for pattern in patterns:
-                        if re.search(pattern, text_lower):
-                            errors.append(ValidationError(
-                                error_type="allergen_misinformation",
-                                severity=ErrorSeverity.CRITICAL, # ALWAYS CRITICAL
-                                message=f"SAFETY ALERT: '{dish['name']}' contains {allergen}, but response suggests it might be {allergen}-free.",
-                                details={
-                                    "dish": dish['name'],
-                                    "allergen_found": allergen,
-                                    "conflicting_segment": text.strip()
-                                },
-                                # No auto-fix for safety critical errors. Block it.
-                                original_text=None, 
-                                corrected_text=None
-                            ))
-                            break # Found one false claim for this allergen, no need to check other patterns
+                if dish_mask & layout.allergen_bits.get(allergen, 0):
+                    if conflicting_segment is None:
+                        conflicting_segment = text.strip()
+                    errors.append(ValidationError(
+                        error_type="allergen_misinformation",
+                        severity=ErrorSeverity.CRITICAL, # ALWAYS CRITICAL
+                        message=f"SAFETY ALERT: '{dish_name}' contains {allergen}, but response suggests it might be {allergen}-free.",
+                        details={
+                            "dish": dish_name,
+                            "allergen_found": allergen,
+                            "conflicting_segment": conflicting_segment
+                        },
+                        # No auto-fix for safety critical errors. Block it.
+                        original_text=None, 
+                        corrected_text=None
+                    ))
 
         return errors
@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, Set
+from typing import List, Dict, Any, Optional, Set, Tuple, FrozenSet, Mapping, Pattern, Union
 from dataclasses import dataclass, field
 from enum import Enum
+import re
+from ...menu_data import Dish
 
 class ErrorSeverity(Enum):
     CRITICAL = "critical"
@@ -27,13 +29,196 @@ class ValidationResult:
     def critical_errors(self) -> List[ValidationError]:
         return [e for e in self.errors if e.severity == ErrorSeverity.CRITICAL]
 
+@dataclass(frozen=True)
+class MenuLayout:
+    """
+    Structure-of-arrays view of a menu index, built once per menu.
+    Row i of every tuple describes the same dish.
+    """
+    names: Tuple[str, ...]                  # display names, e.g. "Pad Thai"
+    prices: Tuple[float, ...]
+    price_cents: Tuple[int, ...]            # the same prices as integer cents
+    allergens: Tuple[FrozenSet[str], ...]   # lowercase allergen names
+    allergen_masks: Tuple[int, ...]         # the same sets as bitmasks over allergen_bits
+    allergen_names: Tuple[str, ...]         # allergen vocabulary; name i owns bit 1 << i
+    allergen_bits: Dict[str, int]           # lowercase allergen -> its single bit
+    name_to_idx: Dict[str, int]             # lowercase name -> row
+    names_pattern: Pattern                  # case-insensitive lookahead alternation, one capturing group per name
+    group_rows: Tuple[int, ...]             # names_pattern group number - 1 -> row
+    prefix_rows: Dict[int, Tuple[Tuple[int, int], ...]]  # row -> (row, name length) of names that are proper prefixes of its name
+    source: Mapping[str, Dict]              # the menu index this was built from
+
+    def mask_of(self, allergens) -> int:
+        """Bitmask for lowercase allergen names; names not on the menu have no bit."""
+        mask = 0
+        for allergen in allergens:
+            mask |= self.allergen_bits.get(allergen, 0)
+        return mask
+
+    def allergens_of(self, mask: int) -> List[str]:
+        """Allergen names for the bits set in mask, lowest bit first."""
+        names = []
+        while mask:
+            low = mask & -mask  # lowest set bit
+            names.append(self.allergen_names[low.bit_length() - 1])
+            mask ^= low
+        return names
+
+
+def build_menu_layout(menu_index: Mapping[str, Union[Dish, Dict]]) -> MenuLayout:
+    """Flatten a menu index (lowercase name -> Dish or item dict) into a MenuLayout."""
+    names_lower = list(menu_index)
+    dishes = [
+        item if isinstance(item, Dish) else Dish.from_item(item)
+        for item in (menu_index[n] for n in names_lower)
+    ]
+
+    # Every dish whose name occurs in the text counts as mentioned, even where
+    # names overlap ("pad thai curry" names both "pad thai" and "thai curry").
+    # No word boundaries. The alternation sits in a lookahead, so the scan tries
+    # every position and finds the longest name starting there; names that are
+    # prefixes of it, which start at the same position, come from prefix_rows.
+    # The class of first letters in front lets most positions fail on one test.
+    # Each name is its own group, so a match maps to its row by group number:
+    # under Unicode case folding the matched text need not lowercase to the name
+    # (e.g. "ſ" or the Kelvin sign).
+    group_rows = tuple(sorted(range(len(names_lower)), key=lambda i: len(names_lower[i]), reverse=True))
+    alternation = "|".join(f"({re.escape(names_lower[i])})" for i in group_rows)
+    prefix_rows = {}
+    for i, name in enumerate(names_lower):
+        prefixes = tuple((j, len(other)) for j, other in enumerate(names_lower) if len(other) < len(name) and name.startswith(other))
+        if prefixes:
+            prefix_rows[i] = prefixes
+    first_letters = "".join(sorted({re.escape(n[0]) for n in names_lower if n}))
+    alternation = f"(?=[{first_letters}])(?=(?:{alternation}))"
+
+    allergens = tuple(dish.allergens for dish in dishes)
+    allergen_names = tuple(sorted(set().union(*allergens)))
+    allergen_bits = {allergen: 1 << i for i, allergen in enumerate(allergen_names)}
+
+    return MenuLayout(
+        names=tuple(dish.name for dish in dishes),
+        prices=tuple(dish.price for dish in dishes),
+        price_cents=tuple(dish.price_cents for dish in dishes),
+        allergens=allergens,
+        allergen_masks=tuple(sum(allergen_bits[a] for a in dish_allergens) for dish_allergens in allergens),
+        allergen_names=allergen_names,
+        allergen_bits=allergen_bits,
+        name_to_idx={n: i for i, n in enumerate(names_lower)},
+        names_pattern=re.compile(alternation, re.IGNORECASE) if names_lower else re.compile(r"(?!)"),
+        group_rows=group_rows,
+        prefix_rows=prefix_rows,
+        source=menu_index
+    )
+
+
+# How many menus get_menu_layout remembers
+LAYOUT_CACHE_SIZE = 8
+
+# id(menu_index) -> layout, shared by every validator. Each layout keeps its
+# menu alive through .source, so an id cannot be reused while it is cached.
+_LAYOUT_CACHE: Dict[int, MenuLayout] = {}
+
+
+def _cache_layout(layout: MenuLayout) -> MenuLayout:
+    """Make layout the shared one for its menu, dropping the oldest entry when full."""
+    key = id(layout.source)
+    if key not in _LAYOUT_CACHE and len(_LAYOUT_CACHE) >= LAYOUT_CACHE_SIZE:
+        _LAYOUT_CACHE.pop(next(iter(_LAYOUT_CACHE)), None)
+    _LAYOUT_CACHE[key] = layout
+    return layout
+
+
+def get_menu_layout(menu_index: Mapping[str, Dict]) -> MenuLayout:
+    """
+    Layout for menu_index, built on first use and reused afterwards.
+    A menu changed in place keeps its old layout until invalidate_menu_layout is called.
+    """
+    layout = _LAYOUT_CACHE.get(id(menu_index))
+    if layout is None or layout.source is not menu_index:
+        layout = _cache_layout(build_menu_layout(menu_index))
+    return layout
+
+
+def invalidate_menu_layout(menu_index: Mapping[str, Dict]) -> None:
+    """Forget the layout of a menu changed in place; the next validation rebuilds it."""
+    layout = _LAYOUT_CACHE.get(id(menu_index))
+    if layout is not None and layout.source is menu_index:
+        del _LAYOUT_CACHE[id(menu_index)]
+
+
+@dataclass
+class NormalizedText:
+    """
+    A response prepared once and shared by every validator that checks it:
+    the original text, the menu layout it is checked against, and where each
+    dish is mentioned. Matching is case-insensitive, so no lowercase copy is kept.
+    """
+    raw: str
+    layout: MenuLayout
+    mentions: List[Tuple[int, int, int]]    # (start, end, row) of each dish mention, in text order
+
+    @classmethod
+    def scan(cls, text: str, layout: MenuLayout) -> "NormalizedText":
+        """One pass over the text finds every mentioned dish, overlapping mentions included."""
+        group_rows = layout.group_rows
+        mentions = [(m.start(), m.end(m.lastindex), group_rows[m.lastindex - 1]) for m in layout.names_pattern.finditer(text)]
+        prefix_rows = layout.prefix_rows
+        if prefix_rows:
+            # IGNORECASE matches character by character, so a prefix name spans its own length
+            mentions.extend([
+                (start, start + length, p)
+                for start, _, row in mentions if row in prefix_rows for p, length in prefix_rows[row]
+            ])
+            mentions.sort()
+        return cls(raw=text, layout=layout, mentions=mentions)
+
+    @property
+    def mentioned_rows(self) -> List[int]:
+        """Rows of all dishes named in the text, in menu order."""
+        return sorted({row for _, _, row in self.mentions})
+
+
 class BaseValidator(ABC):
     """Abstract base class for all output validators."""
-    
-    @abstractmethod
+
+    def __init__(self, layout: Optional[MenuLayout] = None):
+        # Optional precomputed layout of the menu this validator will mostly see.
+        # It becomes the shared layout for that menu, so invalidate_menu_layout covers it too.
+        self.layout = _cache_layout(layout) if layout is not None else None
+
+    def _layout_for(self, menu_index: Mapping[str, Dict]) -> MenuLayout:
+        """The shared layout for menu_index (the precomputed one, unless invalidated since)."""
+        return get_menu_layout(menu_index)
+
+    def _may_have_errors(self, text: str) -> bool:
+        """Cheap pre-check: False means the text cannot produce an error, so it is not scanned."""
+        return bool(text)
+
     def validate(self, text: str, menu_index: Dict[str, Dict], user_constraints: Optional[Set[str]] = None) -> List[ValidationError]:
         """
         Validate the text against the menu index.
+        Returns a list of ValidationErrors (empty if valid).
+        """
+        if not self._may_have_errors(text):
+            return []
+        return self.check(NormalizedText.scan(text, self._layout_for(menu_index)), user_constraints)
+
+    def validate_batch(self, texts: List[str], menu_index: Dict[str, Dict], user_constraints: Optional[Set[str]] = None) -> List[List[ValidationError]]:
+        """
+        Validate many responses against the same menu and constraints.
+        Returns one error list per text, in order. The layout is resolved once for the batch.
+        """
+        layout = self._layout_for(menu_index)
+        return [
+            self.check(NormalizedText.scan(text, layout), user_constraints) if self._may_have_errors(text) else []
+            for text in texts
+        ]
+
+    @abstractmethod
+    def check(self, ctx: NormalizedText, user_constraints: Optional[Set[str]] = None) -> List[ValidationError]:
+        """
+        Validate an already scanned response.
         Must return a list of ValidationErrors (empty if valid).
         """
         pass
\ No newline at end of file
@@ -0,0 +1,72 @@
+from typing import List, Dict, Set, Optional, Protocol, Union
+from .base import BaseValidator, ErrorSeverity, ValidationError, MenuLayout, NormalizedText, get_menu_layout, _cache_layout
+
+
+class OutputCheck(Protocol):
+    """Anything that checks a scanned response, e.g. a bound BaseValidator.check."""
+    def __call__(self, ctx: NormalizedText, user_constraints: Optional[Set[str]] = None) -> List[ValidationError]:
+        ...
+
+
+class OutputValidationPipeline:
+    """
+    Runs several output checks off a single scan for dish names.
+    The response is scanned once into a NormalizedText that every check
+    reads; the PriceValidator reads prices with an anchored match right after
+    each mention, and the AllergenValidator only scans for safe claims when
+    some dish is mentioned.
+    Gives the same errors as calling each validator in turn. All checks are
+    about menu items, so a response naming no dish is valid without running them.
+    """
+
+    def __init__(self, *validators: Union[BaseValidator, OutputCheck], layout: Optional[MenuLayout] = None):
+        # Plain table of check functions, called in order
+        self._checks = tuple(v.check if isinstance(v, BaseValidator) else v for v in validators)
+        # Precomputed layout: given, or the first one a validator was built with.
+        # Either way it is the shared layout for its menu, looked up per call.
+        self.layout = _cache_layout(layout) if layout is not None else next(
+            (v.layout for v in validators if isinstance(v, BaseValidator) and v.layout is not None), None
+        )
+
+    def validate(self, text: str, menu_index: Dict[str, Dict], user_constraints: Optional[Set[str]] = None,
+                 *, stop_on: Optional[ErrorSeverity] = None) -> List[ValidationError]:
+        """
+        Errors from every check, in the order the checks were given.
+        With stop_on set, the remaining checks are skipped once a check
+        reports an error of that severity.
+        """
+        if not text:
+            return []
+
+        layout = get_menu_layout(menu_index)
+
+        ctx = NormalizedText.scan(text, layout)
+        if not ctx.mentions:
+            return []
+
+        errors = []
+        for check in self._checks:
+            found = check(ctx, user_constraints)
+            errors.extend(found)
+            if stop_on is not None and any(e.severity == stop_on for e in found):
+                break
+        return errors
+
+
+_DEFAULT_PIPELINE: Optional[OutputValidationPipeline] = None
+
+
+def validate_all(response: str, menu_index: Dict[str, Dict], constraints: Optional[Set[str]] = None,
+                 *, stop_on: Optional[ErrorSeverity] = ErrorSeverity.CRITICAL) -> List[ValidationError]:
+    """
+    Run the allergen and price checks on a response, safety first.
+    Stops at the first check that reports a stop_on error: a response
+    blocked for an unsafe recommendation does not need its prices checked.
+    Pass stop_on=None to always run every check.
+    """
+    global _DEFAULT_PIPELINE
+    if _DEFAULT_PIPELINE is None:
+        from .allergen import AllergenValidator
+        from .price import PriceValidator
+        _DEFAULT_PIPELINE = OutputValidationPipeline(AllergenValidator(), PriceValidator())
+    return _DEFAULT_PIPELINE.validate(response, menu_index, constraints, stop_on=stop_on)
@@ -1,6 +1,14 @@
 import re
-from typing import List, Dict, Set, Optional
-from .base import BaseValidator, ValidationError, ErrorSeverity
+from typing import List, Set, Optional
+from .base import BaseValidator, ValidationError, ErrorSeverity, NormalizedText
+
+# What must follow a dish name for its price to be checked:
+# - Up to 50 characters that are NOT digits, '$', or newlines (fillers)
+# - Optionally '$'
+# - The price digits exactly (e.g., "12.99"), captured as group 1
+# The filler run is possessive (Python 3.11+): giving characters back can never
+# expose a '$' or digit, so a mention with no price fails without backtracking.
+PRICE_TAIL = re.compile(r"[^$0-9\n]{0,50}+\$?(\d+\.\d{2})")
 
 class PriceValidator(BaseValidator):
     """
@@ -9,59 +17,62 @@ class PriceValidator(BaseValidator):
     Supports auto-correction by providing original and corrected text segments.
     """
 
-    def validate(self, text: str, menu_index: Dict[str, Dict], user_constraints: Optional[Set[str]] = None) -> List[ValidationError]:
+    def _may_have_errors(self, text: str) -> bool:
+        # Every price the pattern can match has a decimal point
+        return '.' in text
+
+    def check(self, ctx: NormalizedText, user_constraints: Optional[Set[str]] = None) -> List[ValidationError]:
         """
-        Validates prices in the text against the menu index.
+        Validates prices next to the dish mentions found in ctx.
         Ignores user_constraints as price accuracy is universal.
         """
+        text = ctx.raw
+        layout = ctx.layout
         errors = []
-        text_lower = text.lower()
+        matched_until = {}  # row -> end of that dish's last price match
 
-        for dish_name_lower, dish_info in menu_index.items():
-            if dish_name_lower not in text_lower:
+        # 1. Read the price right after each dish mention
+        for start, name_end, row in ctx.mentions:
+            # A mention inside the previous match for the same dish was already covered
+            if start < matched_until.get(row, 0):
+                continue
+            tail = PRICE_TAIL.match(text, name_end)
+            if tail is None:
                 continue
+            end = matched_until[row] = tail.end()
+            stated_price_str = tail.group(1)
 
-            # 2. Construct regex for this dish.
-            # It looks for:
-            # - The exact dish name (case-insensitive)
-            # - Followed by up to 50 characters that are NOT digits, '$', or newlines (fillers)
-            # - Followed optionally by '$'
-            # - Captures the price digits exactly (e.g., "12.99")
-            pattern = re.compile(
-                re.escape(dish_name_lower) + r"(?:[^$0-9\n]{0,50})\$?(\d+\.\d{2})",
-                re.IGNORECASE
-            )
+            # 2. Compare as integer cents: prices always have exactly two decimals
+            whole, frac = stated_price_str.split('.')
+            stated_cents = int(whole) * 100 + int(frac)
+            actual_cents = layout.price_cents[row]
 
-            # 3. Find all occurrences of this dish followed by a price
-            for match in pattern.finditer(text):
-                full_match_text = match.group(0)   # e.g., "Pad Thai costs $10.50"
-                stated_price_str = match.group(1)  # e.g., "10.50"
-                
-                stated_price = float(stated_price_str)
-                actual_price = dish_info['price']
+            if stated_cents != actual_cents:
+                dish_name = layout.names[row]
+                full_match_text = text[start:end]  # e.g., "Pad Thai costs $10.50", price "10.50"
+                stated_price = stated_cents / 100
+                actual_price = layout.prices[row]
 
-                # 4. Compare with a tiny epsilon for float safety
-                if abs(stated_price - actual_price) > 0.001:
-                    # If a mismatch is found, fix the wrong price
-                    # We take the matched segment ("Pad Thai costs $10.50")
-                    # and replace only the price part ("10.50" -> "13.99")
-                    corrected_match_text = full_match_text.replace(
-                        stated_price_str,
-                        f"{actual_price:.2f}"
-                    )
+                # If a mismatch is found, fix the wrong price
+                # We take the matched segment ("Pad Thai costs $10.50")
+                # and replace only the price part ("10.50" -> "13.99")
+                corrected_match_text = full_match_text.replace(
+                    stated_price_str,
+                    f"{actual_cents // 100}.{actual_cents % 100:02d}"
+                )
 
-                    errors.append(ValidationError(
-                        error_type="incorrect_price",
-                        severity=ErrorSeverity.HIGH, # High because it's factual wrong, but usually not life-threatening
-                        message=f"Incorrect price for '{dish_info['name']}': stated ${stated_price:.2f}, actual ${actual_price:.2f}",
-                        details={
-                            "dish": dish_info['name'],
-                            "stated_price": stated_price,
-                            "actual_price": actual_price
-                        },
-                        # These allow the main loop to perform str.replace() securely
-                        original_text=full_match_text,
-                        corrected_text=corrected_match_text
-                    ))
+                errors.append(ValidationError(
+                    error_type="incorrect_price",
+                    severity=ErrorSeverity.HIGH, # High because it's factual wrong, but usually not life-threatening
+                    message=f"Incorrect price for '{dish_name}': stated ${stated_cents // 100}.{stated_cents % 100:02d}, actual ${actual_cents // 100}.{actual_cents % 100:02d}",
+                    details={
+                        "dish": dish_name,
+                        "stated_price": stated_price,
+                        "actual_price": actual_price
+                    },
+                    # These allow the main loop to perform str.replace() securely
+                    original_text=full_match_text,
+                    corrected_text=corrected_match_text
+                ))
 
         return errors
\ No newline at end of file
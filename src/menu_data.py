@@ -1,3 +1,8 @@
+import sys
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Mapping
+
 SAMPLE_MENU = {
     "appetizers": [
         {"name": "Spring Rolls", "price": 6.99, "vegetarian": True, "allergens": ["gluten", "soy"], "spicy": False},
@@ -25,6 +30,43 @@ SAMPLE_MENU = {
     ],
 }
 
+
+@dataclass(frozen=True, slots=True)
+class Dish:
+    """One menu item, with the values validators need computed once."""
+    name: str
+    name_lower: str
+    price: float
+    price_cents: int                # price as integer cents
+    allergens: FrozenSet[str]       # lowercase allergen names
+    vegetarian: bool = False
+    spicy: bool = False
+    description: str = ""
+
+    @classmethod
+    def from_item(cls, item: Mapping) -> "Dish":
+        """Build a Dish from a menu item dict (see SAMPLE_MENU)."""
+        return cls(
+            name=item['name'],
+            name_lower=sys.intern(item['name'].lower()),
+            price=item['price'],
+            price_cents=round(item['price'] * 100),
+            allergens=frozenset(a.lower() for a in item.get('allergens', [])),
+            vegetarian=item.get('vegetarian', False),
+            spicy=item.get('spicy', False),
+            description=item.get('description', ""),
+        )
+
+
+def build_menu_index(menu: Dict) -> Dict[str, Dish]:
+    """Flatten a menu (category -> items) into lowercase name -> Dish for O(1) lookups."""
+    dishes = (Dish.from_item(item) for items in menu.values() for item in items)
+    return {dish.name_lower: dish for dish in dishes}
+
+
+# SAMPLE_MENU indexed once at import; read-only so it can be shared freely
+MENU_INDEX: Mapping[str, Dish] = MappingProxyType(build_menu_index(SAMPLE_MENU))
+
 # SAMPLE_MENU = {
 #     "starters": [
 #         {
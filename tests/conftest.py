@@ -0,0 +1,33 @@
+"""
+Shared pytest fixtures.
+"""
+
+import os
+import pytest
+from src.guardrails.input.off_topic import OffTopicDetector
+from src.menu_data import MENU_INDEX
+
+# Encoder backend for the off-topic tests: "torch" (default) or "onnx".
+# ONNX Runtime runs the exported graph with fused CPU kernels; the export is
+# made on first use and kept in the Hugging Face cache for later runs.
+TEST_BACKEND = os.environ.get("GUARDRAILS_TEST_BACKEND", "torch")
+# GUARDRAILS_TEST_QUANTIZED=1 uses the int8 ONNX export on CPUs with VNNI or ARM64
+TEST_QUANTIZED = os.environ.get("GUARDRAILS_TEST_QUANTIZED", "") == "1"
+
+
+@pytest.fixture(scope="session")
+def off_topic_detector():
+    """
+    One OffTopicDetector per test session (per worker under pytest-xdist),
+    so the embedding model and prototype embeddings are loaded once.
+    Its query cache is shared too: it is keyed on the exact text that is
+    encoded, so a cached result is the one the model would give, whatever
+    ran before.
+    """
+    return OffTopicDetector(backend=TEST_BACKEND, quantized=TEST_QUANTIZED)
+
+
+@pytest.fixture
+def menu_index():
+    """Menu index for SAMPLE_MENU (prebuilt and read-only, so shared by every test)."""
+    return MENU_INDEX
@@ -7,7 +7,6 @@ import pytest
 from src.guardrails.output.allergen import AllergenValidator
 from src.guardrails.output.base import ErrorSeverity
 from src.guardrails.input.constraints import ConstraintExtractor
-from src.menu_data import SAMPLE_MENU
 
 
 @pytest.fixture
@@ -20,16 +19,6 @@ def constraint_extractor():
     return ConstraintExtractor()
 
 
-@pytest.fixture
-def menu_index():
-    """Build menu index from SAMPLE_MENU."""
-    index = {}
-    for category, items in SAMPLE_MENU.items():
-        for item in items:
-            index[item['name'].lower()] = item
-    return index
-
-
 class TestAllergenValidatorIsolation:
     """Test allergen validator in isolation with predefined constraints."""
 
@@ -214,3 +203,22 @@ class TestAllergenValidatorEdgeCases:
 
         errors = validator.validate(text, menu_index, user_constraints)
         assert len(errors) == 1
+
+    def test_constraint_not_on_menu(self, validator, menu_index):
+        """Test that an allergen no dish contains never blocks a mention."""
+        text = "Try our Pad Thai, it has no sesame"
+        errors = validator.validate(text, menu_index, {"sesame"})
+        assert len(errors) == 0
+
+    def test_overlapping_dish_names(self, validator):
+        """Test that dishes whose names overlap in the text are all checked."""
+        menu_index = {
+            "pad thai": {"name": "Pad Thai", "price": 13.99, "allergens": ["peanuts"]},
+            "thai curry": {"name": "Thai Curry", "price": 12.49, "allergens": ["dairy"]},
+            "thai": {"name": "Thai", "price": 5.00, "allergens": ["soy"]},
+        }
+        # "pad thai curry" names all three dishes
+        errors = validator.validate("Try our pad thai curry", menu_index, {"dairy", "soy"})
+
+        assert sorted(e.details['dish'] for e in errors) == ["Thai", "Thai Curry"]
+        assert all(e.severity == ErrorSeverity.CRITICAL for e in errors)
@@ -0,0 +1,122 @@
+"""
+Test cases for the chatbot's LLM conversation handling.
+The Ollama client and the off-topic detector are replaced by stubs.
+"""
+
+import pytest
+from src.chatbot import RestaurantChatbot
+from src.guardrails.logger import GuardrailLogger
+
+
+class FailingReply(str):
+    """A reply whose stream fails after the first chunk."""
+
+
+class StubClient:
+    """Stands in for ollama.Client: streams a canned reply word by word."""
+
+    def __init__(self, reply="Coffee is $2.49"):
+        self.reply = reply
+        self.sent = []  # messages of every chat() call
+
+    def chat(self, model, messages, stream=False, **kwargs):
+        self.sent.append(list(messages))
+        reply = self.reply
+
+        def chunks():
+            for word in reply.split(" "):
+                yield {"message": {"content": word + " "}}
+                if isinstance(reply, FailingReply):
+                    raise ConnectionError("stream interrupted")
+        return chunks()
+
+
+class StubDetector:
+    def detect(self, text):
+        return "on_topic", 0.9
+
+
+def make_chatbot(tmp_path, **kwargs):
+    bot = RestaurantChatbot(**kwargs)
+    bot.client = StubClient()
+    bot.guardrails._off_topic_detector = StubDetector()
+    bot.guardrails.logger = GuardrailLogger(log_file=str(tmp_path / "logs" / "guardrails.log"))
+    return bot
+
+
+@pytest.fixture
+def chatbot(tmp_path):
+    return make_chatbot(tmp_path)
+
+
+def roles(messages):
+    return [m["role"] for m in messages]
+
+
+class TestConversationHistory:
+    """The history re-sent to the LLM must stay in user/assistant pairs."""
+
+    def test_roles_alternate_after_failed_stream(self, chatbot):
+        """Test that a stream that raises leaves no dangling user turn."""
+        chatbot.client.reply = FailingReply("Coffee is $2.49")
+        result = chatbot.process_query("How much is the coffee?")
+
+        assert result["response"].startswith("Error processing request")
+        assert len(chatbot.llm_messages) == 0
+
+        chatbot.client.reply = "Coffee is $2.49"
+        chatbot.process_query("How much is the coffee?")
+
+        assert roles(chatbot.client.sent[-1]) == ["system", "user"]
+        assert roles(chatbot.llm_messages) == ["user", "assistant"]
+
+    def test_history_eviction_keeps_pairs(self, tmp_path):
+        """Test that the oldest turns are evicted as whole user/assistant pairs."""
+        chatbot = make_chatbot(tmp_path, max_history=2)
+        for question in ["What is the coffee price?", "And the tea?", "And the juice?"]:
+            chatbot.process_query(question)
+
+        assert roles(chatbot.llm_messages) == ["user", "assistant"] * 2
+        assert chatbot.llm_messages[0]["content"] == "And the tea?"
+        assert roles(chatbot.client.sent[-1]) == ["system", "user", "assistant", "user", "assistant", "user"]
+
+    def test_no_history_still_sends_question(self, tmp_path):
+        """Test that max_history=0 keeps no turns but still sends the current one."""
+        chatbot = make_chatbot(tmp_path, max_history=0)
+        chatbot.process_query("How much is the coffee?")
+
+        assert chatbot.client.sent[-1][-1] == {"role": "user", "content": "How much is the coffee?"}
+        assert len(chatbot.llm_messages) == 0
+
+
+class TestStreamingAndCorrection:
+    """Streamed responses and automatic price corrections."""
+
+    def test_stream_partials_then_corrected_final(self, chatbot):
+        """Test that partial chunks come first and one final result replaces them."""
+        chatbot.client.reply = "Coffee is $3.49"
+        events = list(chatbot.process_query_stream("How much is the coffee?"))
+
+        assert [kind for kind, _ in events] == ["partial"] * 3 + ["final"]
+        assert "".join(text for _, text in events[:-1]).strip() == "Coffee is $3.49"
+        result = events[-1][1]
+        assert result["corrected"] and not result["blocked"]
+        assert result["response"].strip() == "Coffee is $2.49"
+
+    def test_stream_final_blocked(self, chatbot):
+        """Test that an unsafe recommendation is blocked in the final result."""
+        chatbot.client.reply = "Try our Pad Thai"
+        events = list(chatbot.process_query_stream("I'm allergic to peanuts, what do you recommend?"))
+
+        kind, result = events[-1]
+        assert kind == "final"
+        assert result["blocked"] and not result["corrected"]
+        assert "SAFETY WARNING" in result["response"]
+
+    def test_multiple_price_corrections(self, chatbot):
+        """Test that every wrong price in a response is corrected in one pass."""
+        chatbot.client.reply = "Coca-Cola is $1.99 and Coffee is $3.00"
+        result = chatbot.process_query("How much are the drinks?")
+
+        assert result["corrected"]
+        assert result["response"].strip() == "Coca-Cola is $2.99 and Coffee is $2.49"
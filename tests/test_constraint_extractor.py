@@ -73,6 +73,18 @@ class TestConstraintExtractor:
         assert "eggs" in constraints
         assert "dairy" in constraints
 
+    def test_other_punctuation_handling(self, extractor):
+        """Test that allergens next to ! ? ; or quotes are still extracted."""
+        text = "Peanuts! Is there any soy? (no 'milk'; please)"
+        constraints = extractor.extract(text, set())
+        assert constraints == {"peanuts", "soy", "dairy"}
+
+    def test_precomputed_lowercase_text(self, extractor):
+        """Test that a caller-provided lowercased copy of the text is used."""
+        text = "I'm allergic to PEANUTS"
+        constraints = extractor.extract(text, set(), text_lower=text.lower())
+        assert constraints == {"peanuts"}
+
 
 class TestConstraintExtractorEdgeCases:
     """Edge cases for constraint extraction."""
@@ -98,3 +110,10 @@ class TestConstraintExtractorEdgeCases:
         assert "gluten" in constraints
         assert "soy" in constraints
         assert "peanuts" in constraints
+
+    def test_no_new_constraints_returns_same_set(self, extractor):
+        """Test that input without new allergens returns the given set itself, not a copy."""
+        existing = {"gluten"}
+        constraints = extractor.extract("Tell me about gluten", existing)
+        assert constraints is existing
+        assert constraints == {"gluten"}
@@ -0,0 +1,52 @@
+"""
+Test cases for the JSON guardrail event logger.
+"""
+
+import json
+import pytest
+from src.guardrails.logger import GuardrailLogger
+
+
+@pytest.fixture
+def logger(tmp_path):
+    return GuardrailLogger(log_file=str(tmp_path / "logs" / "guardrails.log"))
+
+
+def read_events(logger):
+    logger.flush()
+    with open(logger.log_file) as f:
+        return [json.loads(line) for line in f]
+
+
+class TestGuardrailLogger:
+    """Test that events are written as JSON lines."""
+
+    def test_input_block_logged(self, logger):
+        """Test that an input block is written with a timestamp."""
+        logger.log_input_block("off_topic", 0.123456, "Tell me a joke", "abc123")
+
+        events = read_events(logger)
+
+        assert len(events) == 1
+        assert events[0]["type"] == "INPUT_BLOCKED"
+        assert events[0]["similarity_score"] == 0.1235
+        assert "timestamp" in events[0]
+
+    def test_events_written_in_order(self, logger):
+        """Test that many queued events are all written, in call order."""
+        for i in range(100):
+            logger.log_critical_block("unsafe_recommendation", f"block {i}", {"i": i}, "abc123")
+
+        events = read_events(logger)
+
+        assert [e["details"]["i"] for e in events] == list(range(100))
+
+    def test_unserializable_event_skipped(self, logger):
+        """Test that an event that cannot be serialized does not drop the others."""
+        logger.log_critical_block("unsafe_recommendation", "before", {"i": 0}, "abc123")
+        logger.log_critical_block("unsafe_recommendation", "bad", {"allergens": {"dairy"}}, "abc123")
+        logger.log_critical_block("unsafe_recommendation", "after", {"i": 1}, "abc123")
+
+        events = read_events(logger)
+
+        assert [e["message"] for e in events] == ["before", "after"]
@@ -0,0 +1,31 @@
+"""
+Test cases for the GuardrailManager output checks.
+"""
+
+import pytest
+from src.guardrails.manager import GuardrailManager
+from src.guardrails.logger import GuardrailLogger
+from src.menu_data import SAMPLE_MENU
+
+
+def make_manager(tmp_path, parallel_validation):
+    manager = GuardrailManager(SAMPLE_MENU, parallel_validation=parallel_validation)
+    manager.logger = GuardrailLogger(log_file=str(tmp_path / "logs" / "guardrails.log"))
+    manager._update_session_constraints("abc123", {"dairy"})
+    return manager
+
+
+@pytest.mark.parametrize("response", [
+    "The Margherita Pizza is $10.00 and Coffee is $3.00, and it is dairy-free",
+    "Our Pad Thai is $15.00 and it is nut-free",
+    "Coca-Cola is $2.99",
+    "We have great food!",
+])
+def test_parallel_validation_same_errors(tmp_path, response):
+    """Test that the thread-pool path returns the same errors, in the same order."""
+    sequential = make_manager(tmp_path, parallel_validation=False).check_output(response, "abc123")
+    parallel = make_manager(tmp_path, parallel_validation=True).check_output(response, "abc123")
+
+    assert parallel.is_valid == sequential.is_valid
+    assert [(e.error_type, e.message, e.details) for e in parallel.errors] == \
+           [(e.error_type, e.message, e.details) for e in sequential.errors]
@@ -6,6 +6,9 @@ import pytest
 from sklearn.metrics import classification_report, confusion_matrix
 from src.guardrails.input.off_topic import OffTopicDetector, detect_offtopic
 
+# Every test here runs the embedding model
+pytestmark = [pytest.mark.slow, pytest.mark.embedding]
+
 # Evaluation dataset with labeled examples, generated by AI
 EVAL_SET = [
     # on-topic: clear ordering queries
@@ -178,8 +181,8 @@ SAFETY_CRITICAL_CASES = [
 
 
 @pytest.fixture
-def detector():
-    return OffTopicDetector()
+def detector(off_topic_detector):
+    return off_topic_detector
 
 class TestOffTopicDetection:
     """Test cases for the off-topic detection system."""
@@ -241,6 +244,26 @@ class TestOffTopicDetection:
         # With stricter thresholds, this should be off_topic or clarify
         assert result in {"off_topic", "clarify"}
 
+    def test_repeated_query_served_from_cache(self, monkeypatch):
+        """Test that a repeated query does not re-encode, and a differently written one does."""
+        # Own detector, so no other test has filled its cache
+        cached_detector = OffTopicDetector()
+        first = cached_detector.detect("How much is the pizza?")
+        encoded = []
+        encode = cached_detector.model.encode
+
+        def recording_encode(text, *args, **kwargs):
+            encoded.append(text)
+            return encode(text, *args, **kwargs)
+
+        monkeypatch.setattr(cached_detector.model, "encode", recording_encode)
+        assert cached_detector.detect("How much is the pizza?") == first
+        assert encoded == []
+
+        # The tokenizer is case-sensitive, so other casing gets its own score
+        cached_detector.detect("  how much is the PIZZA? ")
+        assert encoded == ["  how much is the PIZZA? "]
+
     def test_convenience_function(self):
         """Test the convenience function detect_offtopic."""
         result = detect_offtopic("What's on the menu?")
@@ -0,0 +1,83 @@
+"""
+Test cases for the combined output validation pipeline.
+Tests that one shared scan gives the same errors as running each validator.
+"""
+
+import pytest
+from src.guardrails.output.price import PriceValidator
+from src.guardrails.output.allergen import AllergenValidator
+from src.guardrails.output.pipeline import OutputValidationPipeline
+from src.guardrails.output.base import NormalizedText, get_menu_layout
+
+
+@pytest.fixture
+def validators():
+    return PriceValidator(), AllergenValidator()
+
+
+@pytest.fixture
+def pipeline(validators):
+    return OutputValidationPipeline(*validators)
+
+
+class TestOutputValidationPipeline:
+    """The pipeline must agree with the individual validators."""
+
+    @pytest.mark.parametrize("text, constraints", [
+        ("The Coca-Cola is $2.99", set()),
+        ("Pad Thai is $10.50 and it is peanut-free", set()),
+        ("Coca-Cola and Coffee $2.49", set()),
+        ("Coffee or Coffee $9.99, and Garlic Bread is dairy free", {"gluten"}),
+        ("Try our PAD THAI for $13.99", {"peanuts"}),
+        ("We have great food and excellent service!", {"peanuts"}),
+        ("", {"peanuts"}),
+    ])
+    def test_matches_individual_validators(self, pipeline, validators, menu_index, text, constraints):
+        """Test that errors, their order and corrections match the separate validators."""
+        price_validator, allergen_validator = validators
+        expected = price_validator.validate(text, menu_index) + allergen_validator.validate(text, menu_index, constraints)
+        errors = pipeline.validate(text, menu_index, constraints)
+
+        assert [(e.error_type, e.message, e.original_text, e.corrected_text) for e in errors] == \
+               [(e.error_type, e.message, e.original_text, e.corrected_text) for e in expected]
+
+    def test_price_and_allergen_errors_together(self, pipeline, menu_index):
+        """Test that one response can produce both kinds of error."""
+        text = "Our Pad Thai costs $9.99"
+        errors = pipeline.validate(text, menu_index, {"peanuts"})
+
+        assert [e.error_type for e in errors] == ["incorrect_price", "unsafe_recommendation"]
+
+    def test_validators_check_one_scan(self, validators, menu_index):
+        """Test that both validators can check the same scanned response."""
+        price_validator, allergen_validator = validators
+        ctx = NormalizedText.scan("Our Pad Thai costs $9.99, PAD THAI again", get_menu_layout(menu_index))
+
+        assert ctx.mentioned_rows == [ctx.layout.name_to_idx["pad thai"]]
+        assert len(ctx.mentions) == 2
+        assert [e.error_type for e in price_validator.check(ctx)] == ["incorrect_price"]
+        assert [e.error_type for e in allergen_validator.check(ctx, {"peanuts"})] == ["unsafe_recommendation"]
+
+    def test_unicode_case_folded_dish_name(self, pipeline, menu_index):
+        """Test that a name matched through Unicode case folding maps to its dish."""
+        # "ſ" (long s) matches "s" case-insensitively but does not lowercase to it
+        ctx = NormalizedText.scan("Spring Rollſ is $1.00", get_menu_layout(menu_index))
+        assert ctx.mentioned_rows == [ctx.layout.name_to_idx["spring rolls"]]
+
+        errors = pipeline.validate("Spring Rollſ is $1.00", menu_index)
+        assert [e.error_type for e in errors] == ["incorrect_price"]
+
+    def test_plain_function_check(self, validators, menu_index):
+        """Test that a plain function can sit in the pipeline next to validators."""
+        seen = []
+
+        def record_dishes(ctx, user_constraints=None):
+            seen.extend(ctx.layout.names[row] for row in ctx.mentioned_rows)
+            return []
+
+        price_validator, _ = validators
+        pipeline = OutputValidationPipeline(price_validator, record_dishes)
+        errors = pipeline.validate("Coffee is $9.99 and Green Tea is $2.49", menu_index)
+
+        assert [e.error_type for e in errors] == ["incorrect_price"]
+        assert seen == ["Coffee", "Green Tea"]
@@ -5,25 +5,14 @@ Tests that the validator catches price hallucinations and inaccuracies.
 
 import pytest
 from src.guardrails.output.price import PriceValidator
-from src.guardrails.output.base import ErrorSeverity
-from src.menu_data import SAMPLE_MENU
+from src.guardrails.output.base import ErrorSeverity, build_menu_layout, get_menu_layout, invalidate_menu_layout
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def validator():
     return PriceValidator()
 
 
-@pytest.fixture
-def menu_index():
-    """Build menu index from SAMPLE_MENU."""
-    index = {}
-    for category, items in SAMPLE_MENU.items():
-        for item in items:
-            index[item['name'].lower()] = item
-    return index
-
-
 class TestPriceValidator:
     """Unit tests for price validation logic."""
 
@@ -93,6 +82,51 @@ class TestPriceValidator:
         assert "Spaghetti Carbonara" in errors[0].message
         assert errors[0].details['actual_price'] == 13.49
 
+    def test_precomputed_layout(self, menu_index):
+        """Test that a validator built with the menu layout gives the same results."""
+        validator = PriceValidator(build_menu_layout(menu_index))
+        text = "Coca-Cola is $1.99 and Coffee is $2.49"
+        errors = validator.validate(text, menu_index)
+
+        assert len(errors) == 1
+        assert errors[0].details['dish'] == "Coca-Cola"
+
+    def test_layout_shared_across_calls(self, validator, menu_index):
+        """Test that the layout for a menu is built once and then reused."""
+        layout = get_menu_layout(menu_index)
+        assert get_menu_layout(menu_index) is layout
+        assert validator._layout_for(menu_index) is layout
+
+    def test_invalidate_layout_after_menu_change(self, validator):
+        """Test that a menu edited in place is picked up once its layout is invalidated."""
+        menu_index = {"burger": {"name": "Burger", "price": 5.00, "allergens": ["gluten"]}}
+        precomputed = PriceValidator(build_menu_layout(menu_index))
+        assert len(validator.validate("Burger is $6.00", menu_index)) == 1
+
+        menu_index["burger"] = {"name": "Burger", "price": 6.00, "allergens": ["gluten"]}
+        invalidate_menu_layout(menu_index)
+
+        assert validator.validate("Burger is $6.00", menu_index) == []
+        assert precomputed.validate("Burger is $6.00", menu_index) == []
+
+    def test_validate_batch(self, validator, menu_index):
+        """Test that a batch gives the same errors as validating each text."""
+        texts = ["Coca-Cola is $1.99", "Coffee is 2.49", "", "Coffee is $3.00"]
+        results = validator.validate_batch(texts, menu_index)
+
+        assert [len(errors) for errors in results] == [1, 0, 0, 1]
+        assert [[e.message for e in errors] for errors in results] == \
+               [[e.message for e in validator.validate(text, menu_index)] for text in texts]
+
+    def test_repeated_dish_mentions(self, validator, menu_index):
+        """Test that each mention of the same dish is checked against its own price."""
+        text = "Coffee is $2.49 today, and Coffee is $3.49 tomorrow"
+        errors = validator.validate(text, menu_index)
+
+        assert len(errors) == 1
+        assert errors[0].details['stated_price'] == 3.49
+        assert errors[0].original_text == "Coffee is $3.49"
+
 
 class TestPriceValidatorEdgeCases:
     """Edge cases and boundary conditions."""